@@ -14,6 +14,8 @@ import hashlib
 import plotly.express as px
 import base64
 from io import BytesIO
+import db_maintenance
+import delta_export
 
 st.set_page_config(layout="wide")
 st.title("🛠️ Gestión Actividades Kanban Soporte Electrónico")
@@ -22,16 +24,30 @@ st.title("🛠️ Gestión Actividades Kanban Soporte Electrónico")
 DB_DIR = "kanban_db"
 os.makedirs(DB_DIR, exist_ok=True)
 DB_FILE = os.path.join(DB_DIR, "kanban.db")
+BACKUP_DIR = os.path.join(DB_DIR, "backups")
+EXPORT_DIR = os.path.join(DB_DIR, "exports")
+
+# Intervalo (segundos) con el que cada sesión revisa si el tablero cambió
+BOARD_REFRESH_SECONDS = int(os.environ.get("KANBAN_REFRESH_SECONDS", "10"))
+if BOARD_REFRESH_SECONDS <= 0:
+    BOARD_REFRESH_SECONDS = 10
+BOARD_TABLES = ["tasks", "task_collaborators", "task_interactions"]
 
 def get_db_connection():
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 def init_db():
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # Solo en bases nuevas: en las existentes reescribiría el encabezado en cada rerun.
+    # Esas se convierten en el mantenimiento programado
+    if cursor.execute("PRAGMA page_count").fetchone()[0] == 0:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             username TEXT PRIMARY KEY,
@@ -66,8 +82,8 @@ def init_db():
         )
     """)
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS task_interactions (
+    task_interactions_schema = """
+        CREATE TABLE IF NOT EXISTS {table} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             task_id INTEGER NOT NULL,
             username TEXT NOT NULL,
@@ -76,7 +92,111 @@ def init_db():
             comment_text TEXT,
             image_base64 TEXT,
             new_status TEXT,
-            progress_value INTEGER
+            progress_value INTEGER,
+            FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE
+        )
+    """
+    cursor.execute(task_interactions_schema.format(table="task_interactions"))
+
+    # Bases creadas antes de declarar la llave foránea de task_interactions
+    if not cursor.execute("PRAGMA foreign_key_list(task_interactions)").fetchall():
+        db_maintenance.backup_database(DB_FILE, BACKUP_DIR)
+        db_maintenance.rebuild_table(conn, "task_interactions", task_interactions_schema.format(table="task_interactions_new"))
+
+    # Contador de cambios del tablero: los triggers lo incrementan en cada escritura
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS board_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    # Se consulta antes de insertar: un INSERT en cada rerun tomaría el bloqueo de escritura
+    if cursor.execute("SELECT 1 FROM board_version WHERE id = 1").fetchone() is None:
+        cursor.execute("INSERT INTO board_version (id, version) VALUES (1, 0)")
+    for table in BOARD_TABLES:
+        for operation in ["INSERT", "UPDATE", "DELETE"]:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_bump_version
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE board_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+    # Registro de filas nuevas, modificadas y borradas para la exportación incremental a BI
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            row_key TEXT
+        )
+    """)
+
+    # Registros creados antes de anotar los borrados: se agregan las columnas y se recrean los triggers
+    export_changes_columns = [row['name'] for row in cursor.execute("PRAGMA table_info(export_changes)").fetchall()]
+    if "deleted" not in export_changes_columns:
+        cursor.execute("ALTER TABLE export_changes ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE export_changes ADD COLUMN row_key TEXT")
+        for table in BOARD_TABLES:
+            for operation in ["insert", "update"]:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{operation}_log_export")
+
+    for table in BOARD_TABLES:
+        # Solo se registra desde la primera exportación de la tabla, para que el registro no crezca sin uso
+        export_enabled = f"EXISTS (SELECT 1 FROM analytics_watermarks WHERE source = 'export:{table}')"
+        for operation in ["INSERT", "UPDATE"]:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_log_export
+                AFTER {operation} ON {table}
+                WHEN {export_enabled}
+                BEGIN
+                    INSERT INTO export_changes (table_name, row_id) VALUES ('{table}', NEW.rowid);
+                END
+            """)
+
+        # Los borrados guardan la llave natural de la fila para exportarlos como lápidas
+        deleted_key = ", ".join(f"'{column}', OLD.{column}" for column in delta_export.EXPORT_KEYS[table])
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_delete_log_export
+            AFTER DELETE ON {table}
+            WHEN {export_enabled}
+            BEGIN
+                INSERT INTO export_changes (table_name, row_id, deleted, row_key)
+                VALUES ('{table}', OLD.rowid, 1, json_object({deleted_key}));
+            END
+        """)
+
+    # Tablas de métricas de flujo, alimentadas de forma incremental desde task_interactions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_watermarks (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS task_flow (
+            task_id INTEGER PRIMARY KEY,
+            shift TEXT NOT NULL,
+            created_date TEXT NOT NULL,
+            started_at TEXT,
+            done_at TEXT,
+            lead_days REAL,
+            cycle_days REAL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_flow (
+            day TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            member TEXT NOT NULL,
+            created INTEGER NOT NULL DEFAULT 0,
+            started INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, dimension, member)
         )
     """)
 
@@ -94,6 +214,7 @@ def init_db():
     conn.close()
 
 init_db()
+db_maintenance.start_scheduler(DB_FILE, BACKUP_DIR)
 
 # --- User Authentication ---
 if "logged_in" not in st.session_state:
@@ -146,10 +267,23 @@ if st.sidebar.button("Cerrar Sesión"):
     logout()
 
 # --- Task Management Functions ---
+def get_board_version(conn=None):
+    close_conn = conn is None
+    if close_conn:
+        conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT version FROM board_version WHERE id = 1").fetchone()
+        return row['version'] if row else 0
+    finally:
+        if close_conn:
+            conn.close()
+
 def load_tasks_from_db():
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # Se lee la versión antes que los datos: si alguien escribe mientras tanto, la próxima revisión recarga
+    board_version = get_board_version(conn)
     cursor.execute("SELECT * FROM tasks")
     tasks_raw = cursor.fetchall()
 
@@ -183,6 +317,17 @@ def load_tasks_from_db():
     conn.close()
     st.session_state.kanban = kanban_data
     st.session_state.all_tasks_df = pd.DataFrame(all_tasks_list)
+    st.session_state.board_version = board_version
+
+def refresh_board_if_changed():
+    if st.session_state.get("board_version") != get_board_version() or "kanban" not in st.session_state:
+        load_tasks_from_db()
+
+@st.fragment(run_every=BOARD_REFRESH_SECONDS)
+def watch_board_changes():
+    # Solo consulta el contador; el tablero se vuelve a dibujar únicamente si hubo cambios
+    if st.session_state.get("board_version") != get_board_version():
+        st.rerun()
 
 def add_task_to_db(task_data, initial_status, responsible_usernames):
     conn = get_db_connection()
@@ -334,7 +479,11 @@ def clear_task_data_from_db():
         cursor.execute("DELETE FROM task_collaborators")
         cursor.execute("DELETE FROM task_interactions")
         cursor.execute("DELETE FROM tasks")
+        cursor.execute("DELETE FROM task_flow")
+        cursor.execute("DELETE FROM daily_flow")
         conn.commit()
+        # Devuelve al sistema las páginas liberadas para que el archivo se reduzca
+        db_maintenance.incremental_vacuum(conn)
         st.success("Tablas de tareas, colaboradores e interacciones vaciadas.")
     except Exception as e:
         st.error(f"Error al vaciar la base de datos: {e}")
@@ -342,6 +491,128 @@ def clear_task_data_from_db():
         conn.close()
     load_tasks_from_db()
 
+def load_maintenance_report():
+    conn = db_maintenance.connect(DB_FILE)
+    try:
+        return {
+            'db_stats': db_maintenance.database_stats(conn),
+            'table_sizes': db_maintenance.table_sizes(conn),
+            'image_sizes': db_maintenance.blob_sizes(conn),
+            'orphan_counts': db_maintenance.count_orphans(conn),
+            'generated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    finally:
+        conn.close()
+
+# --- Flow Analytics ---
+def get_analytics_watermark(cursor, source):
+    row = cursor.execute("SELECT last_id FROM analytics_watermarks WHERE source = ?", (source,)).fetchone()
+    return row['last_id'] if row else 0
+
+def set_analytics_watermark(cursor, source, last_id):
+    cursor.execute(
+        "INSERT INTO analytics_watermarks (source, last_id) VALUES (?, ?) ON CONFLICT (source) DO UPDATE SET last_id = excluded.last_id",
+        (source, last_id)
+    )
+
+def get_task_responsibles(cursor, task_id):
+    rows = cursor.execute("SELECT username FROM task_collaborators WHERE task_id = ?", (task_id,)).fetchall()
+    return [row['username'] for row in rows] or ["Sin asignar"]
+
+def bump_daily_flow(cursor, day, shift, responsibles, column):
+    # Cada evento cuenta una vez por turno y una vez por cada responsable de la tarea
+    members = [("shift", shift)] + [("responsible", username) for username in responsibles]
+    for dimension, member in members:
+        cursor.execute(
+            f"INSERT INTO daily_flow (day, dimension, member, {column}) VALUES (?, ?, ?, 1) "
+            f"ON CONFLICT (day, dimension, member) DO UPDATE SET {column} = {column} + 1",
+            (day, dimension, member)
+        )
+
+def update_flow_rollups():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # Revisión sin bloqueo: si no hay eventos nuevos no se toma el bloqueo de escritura
+        max_task_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        max_interaction_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM task_interactions").fetchone()[0]
+        if (max_task_id <= get_analytics_watermark(cursor, "tasks")
+                and max_interaction_id <= get_analytics_watermark(cursor, "task_interactions")):
+            return
+
+        # Bloqueo de escritura para que dos sesiones no procesen los mismos eventos
+        cursor.execute("BEGIN IMMEDIATE")
+
+        tasks_watermark = initial_tasks_watermark = get_analytics_watermark(cursor, "tasks")
+        new_tasks = cursor.execute(
+            "SELECT id, date, shift FROM tasks WHERE id > ? ORDER BY id", (tasks_watermark,)
+        ).fetchall()
+        for task_row in new_tasks:
+            cursor.execute("INSERT OR IGNORE INTO task_flow (task_id, shift, created_date) VALUES (?, ?, ?)",
+                           (task_row['id'], task_row['shift'], task_row['date']))
+            bump_daily_flow(cursor, task_row['date'], task_row['shift'], get_task_responsibles(cursor, task_row['id']), "created")
+            tasks_watermark = task_row['id']
+
+        interactions_watermark = initial_interactions_watermark = get_analytics_watermark(cursor, "task_interactions")
+        new_interactions = cursor.execute(
+            "SELECT id, task_id, action_type, timestamp FROM task_interactions WHERE id > ? ORDER BY id",
+            (interactions_watermark,)
+        ).fetchall()
+        for interaction in new_interactions:
+            interactions_watermark = interaction['id']
+            flow = cursor.execute("SELECT shift, started_at, done_at FROM task_flow WHERE task_id = ?",
+                                  (interaction['task_id'],)).fetchone()
+            if flow is None:
+                continue
+
+            day = interaction['timestamp'][:10]
+            responsibles = get_task_responsibles(cursor, interaction['task_id'])
+
+            # El trabajo inicia con la primera interacción registrada sobre la tarea
+            if flow['started_at'] is None:
+                cursor.execute("UPDATE task_flow SET started_at = ? WHERE task_id = ?",
+                               (interaction['timestamp'], interaction['task_id']))
+                bump_daily_flow(cursor, day, flow['shift'], responsibles, "started")
+
+            if interaction['action_type'] == 'status_change_to_done' and flow['done_at'] is None:
+                cursor.execute(
+                    "UPDATE task_flow SET done_at = ?, lead_days = julianday(?) - julianday(created_date), "
+                    "cycle_days = julianday(?) - julianday(started_at) WHERE task_id = ?",
+                    (interaction['timestamp'], interaction['timestamp'], interaction['timestamp'], interaction['task_id'])
+                )
+                bump_daily_flow(cursor, day, flow['shift'], responsibles, "completed")
+
+        if tasks_watermark != initial_tasks_watermark:
+            set_analytics_watermark(cursor, "tasks", tasks_watermark)
+        if interactions_watermark != initial_interactions_watermark:
+            set_analytics_watermark(cursor, "task_interactions", interactions_watermark)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        st.error(f"Error al actualizar las métricas de flujo: {e}")
+    finally:
+        conn.close()
+
+def load_flow_rollups(dimension):
+    conn = get_db_connection()
+    try:
+        df_daily = pd.read_sql_query(
+            "SELECT day, member, created, started, completed FROM daily_flow WHERE dimension = ? ORDER BY day",
+            conn, params=(dimension,)
+        )
+        if dimension == "shift":
+            times_query = "SELECT task_id, shift AS member, lead_days, cycle_days FROM task_flow WHERE done_at IS NOT NULL"
+        else:
+            times_query = """
+                SELECT tf.task_id, COALESCE(tc.username, 'Sin asignar') AS member, tf.lead_days, tf.cycle_days
+                FROM task_flow tf LEFT JOIN task_collaborators tc ON tc.task_id = tf.task_id
+                WHERE tf.done_at IS NOT NULL
+            """
+        df_times = pd.read_sql_query(times_query, conn)
+        return df_daily, df_times
+    finally:
+        conn.close()
+
 # --- Formatear Tarea ---
 def formatear_tarea_display(t):
     card_color = "#393E46"
@@ -393,6 +664,15 @@ def formatear_tarea_display(t):
         'interactions': t.get('interactions', [])
     }
 
+# --- Live Board Updates ---
+refresh_board_if_changed()
+
+auto_refresh = st.sidebar.toggle("🔄 Actualización automática", value=True, key="auto_refresh_toggle")
+if auto_refresh:
+    st.sidebar.caption(f"El tablero se revisa cada {BOARD_REFRESH_SECONDS} s.")
+    with st.sidebar:
+        watch_board_changes()
+
 # --- Tab Creation ---
 admin_roles = ["Admin", "Supervisor", "Coordinador"]
 if st.session_state.current_role in admin_roles:
@@ -495,7 +775,7 @@ with tab2:
             ]
 
             if visibles:
-                for i, task in enumerate(visibles):
+                for task in visibles:
                     task_display = formatear_tarea_display(task)
 
                     st.markdown(task_display['card_html'], unsafe_allow_html=True)
@@ -520,9 +800,9 @@ with tab2:
                     if estado in ['Por hacer', 'En proceso']:
                         if st.session_state.current_role in admin_roles or st.session_state.username in task.get("responsible_list", []):
                             with st.expander(f"✏️ Actualizar tarea: {task['task']}", expanded=False):
-                                comment_key = f"comment-{task['id']}-{i}"
-                                uploaded_file_key = f"upload-{task['id']}-{i}"
-                                progress_slider_key = f"progress_slider-{task['id']}-{i}"
+                                comment_key = f"comment-{task['id']}"
+                                uploaded_file_key = f"upload-{task['id']}"
+                                progress_slider_key = f"progress_slider-{task['id']}"
 
                                 current_progress = task.get('progress', 0)
                                 new_progress = st.slider("Porcentaje de Avance:", 0, 100, current_progress, 10, key=progress_slider_key)
@@ -533,7 +813,7 @@ with tab2:
                                 col_buttons_interaction = st.columns(2)
 
                                 with col_buttons_interaction[0]:
-                                    if st.button(f"Actualizar Avance y Comentario", key=f"submit_progress_comment-{task['id']}-{i}"):
+                                    if st.button(f"Actualizar Avance y Comentario", key=f"submit_progress_comment-{task['id']}"):
                                         image_base64 = None
                                         if uploaded_file is not None:
                                             bytes_data = uploaded_file.getvalue()
@@ -553,7 +833,7 @@ with tab2:
                                         st.rerun()
 
                                 with col_buttons_interaction[1]:
-                                    if st.button(f"Marcar como Hecha (100% Avance)", key=f"submit_done-{task['id']}-{i}"):
+                                    if st.button(f"Marcar como Hecha (100% Avance)", key=f"submit_done-{task['id']}"):
                                         image_base64 = None
                                         if uploaded_file is not None:
                                             bytes_data = uploaded_file.getvalue()
@@ -682,6 +962,71 @@ if st.session_state.current_role in admin_roles:
         else:
             st.info("No hay datos de tareas para generar estadísticas.")
 
+        st.markdown("---")
+        st.header("⏱️ Análisis de Flujo")
+        update_flow_rollups()
+
+        agrupacion = st.radio("Agrupar por:", ["Turno", "Responsable"], horizontal=True, key="flow_group_radio")
+        df_daily, df_times = load_flow_rollups("shift" if agrupacion == "Turno" else "responsible")
+
+        if not df_daily.empty:
+            miembros = sorted(df_daily['member'].unique())
+            miembros_seleccionados = st.multiselect(f"{agrupacion}:", miembros, default=miembros, key="flow_members_multiselect")
+
+            if miembros_seleccionados:
+                df_times = df_times[df_times['member'].isin(miembros_seleccionados)]
+                df_daily = df_daily[df_daily['member'].isin(miembros_seleccionados)].copy()
+                df_daily['day'] = pd.to_datetime(df_daily['day'])
+
+                # Serie diaria completa por miembro (días sin eventos en cero) para acumular WIP y pendientes
+                all_days = pd.date_range(df_daily['day'].min(), max(df_daily['day'].max(), pd.Timestamp(date.today())))
+                full_index = pd.MultiIndex.from_product([miembros_seleccionados, all_days], names=['member', 'day'])
+                df_flow = (df_daily.groupby(['member', 'day'])[['created', 'started', 'completed']].sum()
+                           .reindex(full_index, fill_value=0)
+                           .reset_index())
+                grouped = df_flow.groupby('member')
+                df_flow['WIP'] = grouped['started'].cumsum() - grouped['completed'].cumsum()
+                df_flow['Pendientes'] = grouped['created'].cumsum() - grouped['completed'].cumsum()
+                flow_labels = {'day': 'Fecha', 'member': agrupacion}
+
+                st.subheader("Distribución de Lead Time y Cycle Time")
+                if not df_times.empty:
+                    df_times_long = df_times.melt(id_vars='member', value_vars=['lead_days', 'cycle_days'],
+                                                  var_name='Métrica', value_name='Días').dropna()
+                    df_times_long['Métrica'] = df_times_long['Métrica'].map({'lead_days': 'Lead Time', 'cycle_days': 'Cycle Time'})
+                    fig_times = px.histogram(df_times_long, x='Días', color='Métrica', barmode='overlay',
+                                             title='Días desde creación (Lead) e inicio (Cycle) hasta terminar',
+                                             labels={'Días': 'Días'})
+                    st.plotly_chart(fig_times, use_container_width=True)
+                    # Por responsable una tarea aparece una vez por colaborador: la mediana se toma por tarea
+                    df_task_times = df_times.drop_duplicates('task_id')
+                    st.caption(f"Mediana Lead Time: {df_task_times['lead_days'].median():.1f} días · "
+                               f"Mediana Cycle Time: {df_task_times['cycle_days'].median():.1f} días")
+                else:
+                    st.info("Aún no hay tareas terminadas para calcular tiempos de entrega.")
+
+                st.subheader("Throughput Diario")
+                fig_throughput = px.bar(df_flow, x='day', y='completed', color='member',
+                                        title='Tareas Terminadas por Día',
+                                        labels={**flow_labels, 'completed': 'Tareas Terminadas'})
+                st.plotly_chart(fig_throughput, use_container_width=True)
+
+                st.subheader("Trabajo en Proceso (WIP)")
+                fig_wip = px.line(df_flow, x='day', y='WIP', color='member',
+                                  title='Tareas Iniciadas sin Terminar',
+                                  labels={**flow_labels, 'WIP': 'Tareas en Proceso'})
+                st.plotly_chart(fig_wip, use_container_width=True)
+
+                st.subheader("Burndown")
+                fig_burndown = px.line(df_flow, x='day', y='Pendientes', color='member',
+                                       title=f'Tareas Pendientes por {agrupacion}',
+                                       labels={**flow_labels, 'Pendientes': 'Tareas Pendientes'})
+                st.plotly_chart(fig_burndown, use_container_width=True)
+            else:
+                st.info(f"Selecciona al menos un {agrupacion.lower()} para ver el análisis de flujo.")
+        else:
+            st.info("Aún no hay historial de interacciones para el análisis de flujo.")
+
 # --- Tab 4: User Management ---
 if st.session_state.current_role in admin_roles:
     with tab4:
@@ -753,12 +1098,87 @@ if st.session_state.current_role in admin_roles:
                 )
                 st.info("Haz clic en el botón 'Descargar Archivo Excel' de arriba para guardar el historial.")
 
+        export_format = "Parquet" if delta_export.PARQUET_AVAILABLE else "CSV"
+        if st.button(f"Exportar Cambios para BI ({export_format})", key="delta_export_button"):
+            try:
+                written = delta_export.export_deltas(DB_FILE, EXPORT_DIR)
+                if written:
+                    for table, result in written.items():
+                        if result['file']:
+                            st.success(f"{table}: {result['rows']} filas exportadas a {result['file']}")
+                        if result['deleted_file']:
+                            st.success(f"{table}: {result['deleted']} filas borradas exportadas a {result['deleted_file']}")
+                else:
+                    st.info("No hay cambios nuevos desde la última exportación.")
+            except Exception as e:
+                st.error(f"Error en la exportación incremental: {e}")
+
+        st.markdown("---")
+        st.subheader("Mantenimiento de la Base de Datos")
+        # El reporte recorre tablas e imágenes completas: solo se calcula a pedido o tras una acción
+        maintenance_action_done = False
+        col_maintenance = st.columns(4)
+        with col_maintenance[0]:
+            calculate_sizes = st.button("Calcular Tamaños", key="calculate_sizes_button")
+        with col_maintenance[1]:
+            if st.button("Eliminar Registros Huérfanos", key="purge_orphans_button"):
+                maintenance_action_done = True
+                conn = db_maintenance.connect(DB_FILE)
+                try:
+                    purged = db_maintenance.purge_orphans(conn)
+                    st.success(f"Registros huérfanos eliminados: {sum(purged.values())}")
+                except Exception as e:
+                    st.error(f"Error al eliminar registros huérfanos: {e}")
+                finally:
+                    conn.close()
+        with col_maintenance[2]:
+            if st.button("Compactar y Analizar", key="vacuum_analyze_button"):
+                maintenance_action_done = True
+                conn = db_maintenance.connect(DB_FILE)
+                try:
+                    freed_pages = db_maintenance.incremental_vacuum(conn)
+                    db_maintenance.analyze(conn)
+                    st.success(f"Base de datos compactada ({freed_pages} páginas liberadas) y estadísticas actualizadas.")
+                except Exception as e:
+                    st.error(f"Error al compactar la base de datos: {e}")
+                finally:
+                    conn.close()
+        with col_maintenance[3]:
+            if st.button("Crear Respaldo", key="backup_db_button"):
+                maintenance_action_done = True
+                try:
+                    backup_file = db_maintenance.backup_database(DB_FILE, BACKUP_DIR)
+                    st.success(f"Respaldo creado: {backup_file}")
+                except Exception as e:
+                    st.error(f"Error al crear el respaldo: {e}")
+
+        if calculate_sizes or maintenance_action_done:
+            try:
+                st.session_state.maintenance_report = load_maintenance_report()
+            except Exception as e:
+                st.error(f"Error al calcular los tamaños de la base de datos: {e}")
+
+        if "maintenance_report" in st.session_state:
+            report = st.session_state.maintenance_report
+            col_size, col_free, col_images = st.columns(3)
+            col_size.metric("Tamaño de la Base de Datos", f"{report['db_stats']['total_bytes'] / 1024 / 1024:.2f} MB")
+            col_free.metric("Espacio Libre Recuperable", f"{report['db_stats']['free_bytes'] / 1024 / 1024:.2f} MB")
+            col_images.metric(f"Evidencias ({report['image_sizes']['images']})", f"{report['image_sizes']['total_bytes'] / 1024 / 1024:.2f} MB")
+            df_table_sizes = pd.DataFrame(report['table_sizes'])
+            df_table_sizes.columns = ['Tabla', 'Registros', 'Bytes']
+            st.dataframe(df_table_sizes, use_container_width=True)
+
+            if any(report['orphan_counts'].values()):
+                st.warning("Registros huérfanos: " + ", ".join(f"{table}: {count}" for table, count in report['orphan_counts'].items()))
+            st.caption(f"Tamaños calculados el {report['generated_at']}.")
+
         st.markdown("---")
         st.warning("¡ADVERTENCIA! La siguiente acción eliminará **todos** los datos de tareas, colaboradores e interacciones.")
         confirm_clear = st.checkbox("Entiendo que esta acción es irreversible y vaciará las tareas y sus interacciones.", key="confirm_clear_checkbox")
         if confirm_clear:
             if st.button("Vaciar Base de Datos (Tareas, Comentarios, Evidencias)", key="clear_db_button"):
                 clear_task_data_from_db()
+                st.session_state.pop("maintenance_report", None)
                 st.rerun()
 
 # --- Data Export to Excel ---
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Mantenimiento de la base de datos del Kanban: llaves foráneas, limpieza de
+registros huérfanos, vacuum incremental, ANALYZE, tamaños y respaldos en línea.
+
+Uso desde consola (por ejemplo en un cron):
+    python db_maintenance.py kanban_db/kanban.db report|purge|vacuum|analyze|backup
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ORPHAN_BATCH_SIZE = 500
+VACUUM_PAGES_PER_STEP = 1000
+BACKUP_PAGES_PER_STEP = 256
+BACKUPS_TO_KEEP = 7
+SCHEDULER_CHECK_SECONDS = 600
+
+# Condición que identifica las filas huérfanas de cada tabla
+ORPHAN_RULES = {
+    "task_collaborators": "task_id NOT IN (SELECT id FROM tasks) OR username NOT IN (SELECT username FROM users)",
+    "task_interactions": "task_id NOT IN (SELECT id FROM tasks)",
+}
+
+# Tarea programada -> segundos entre ejecuciones
+MAINTENANCE_JOBS = {
+    "purge_orphans": 24 * 3600,
+    "incremental_vacuum": 24 * 3600,
+    "analyze": 24 * 3600,
+    "backup": 24 * 3600,
+}
+
+def connect(db_file):
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+# --- Llaves foráneas ---
+def rebuild_table(conn, table, create_new_table_sql):
+    # SQLite no permite agregar llaves foráneas con ALTER TABLE: se copia a una tabla nueva.
+    # Los huérfanos se copian tal cual (llaves foráneas apagadas); se eliminan después con purge_orphans
+    if conn.in_transaction:
+        conn.commit()
+
+    seq_row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN")
+        conn.execute(create_new_table_sql)
+        conn.execute(f"INSERT INTO {table}_new SELECT * FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        # Conserva el contador AUTOINCREMENT para que los ids no se reutilicen
+        if seq_row:
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq_row['seq'], table))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+# --- Registros huérfanos ---
+def count_orphans(conn):
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {condition}").fetchone()[0]
+        for table, condition in ORPHAN_RULES.items()
+    }
+
+def purge_orphans(conn, tables=None, batch_size=ORPHAN_BATCH_SIZE):
+    purged = {}
+    for table in tables or ORPHAN_RULES:
+        total = 0
+        while True:
+            # Lotes pequeños para no bloquear la base de datos a otras sesiones
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {ORPHAN_RULES[table]} LIMIT ?)",
+                (batch_size,)
+            )
+            conn.commit()
+            total += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        purged[table] = total
+    return purged
+
+# --- Vacuum y estadísticas ---
+def incremental_vacuum(conn, pages_per_step=VACUUM_PAGES_PER_STEP):
+    if conn.in_transaction:
+        conn.commit()
+    freed_pages = 0
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # El modo incremental solo se activa tras un VACUUM completo (una sola vez)
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        freed_pages += pages_before - conn.execute("PRAGMA page_count").fetchone()[0]
+
+    while True:
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_before == 0:
+            break
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages_per_step)})").fetchall()
+        conn.commit()
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        freed_pages += free_before - free_after
+        if free_after >= free_before:
+            break
+    return freed_pages
+
+def analyze(conn):
+    conn.execute("ANALYZE")
+    conn.commit()
+
+def database_stats(conn):
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "page_size": page_size,
+        "total_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist_count,
+        "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+    }
+
+def table_sizes(conn):
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()]
+    try:
+        # dbstat solo existe si SQLite se compiló con SQLITE_ENABLE_DBSTAT_VTAB
+        table_bytes = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        table_bytes = {}
+    return [
+        {
+            "table": table,
+            "rows": conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0],
+            "bytes": table_bytes.get(table),
+        }
+        for table in tables
+    ]
+
+def blob_sizes(conn):
+    row = conn.execute("""
+        SELECT COUNT(image_base64) AS images,
+               COALESCE(SUM(LENGTH(image_base64)), 0) AS total_bytes,
+               COALESCE(MAX(LENGTH(image_base64)), 0) AS max_bytes
+        FROM task_interactions
+    """).fetchone()
+    return dict(row)
+
+# --- Respaldos ---
+def backup_database(db_file, backup_dir, keep=BACKUPS_TO_KEEP):
+    os.makedirs(backup_dir, exist_ok=True)
+    target_file = os.path.join(backup_dir, f"kanban_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+
+    source = connect(db_file)
+    target = sqlite3.connect(target_file)
+    try:
+        # La API de respaldo copia por bloques y reinicia si otra conexión escribe: la app sigue en línea
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, sleep=0.05)
+    finally:
+        target.close()
+        source.close()
+
+    for old_backup in sorted(glob.glob(os.path.join(backup_dir, "kanban_*.db")))[:-keep]:
+        os.remove(old_backup)
+    return target_file
+
+# --- Programación ---
+def run_due_maintenance(db_file, backup_dir, jobs=MAINTENANCE_JOBS):
+    conn = connect(db_file)
+    results = {}
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                job TEXT PRIMARY KEY,
+                last_run TEXT NOT NULL
+            )
+        """)
+        now = datetime.now()
+        for job, interval_seconds in jobs.items():
+            row = conn.execute("SELECT last_run FROM maintenance_runs WHERE job = ?", (job,)).fetchone()
+            if row and (now - datetime.fromisoformat(row['last_run'])).total_seconds() < interval_seconds:
+                continue
+
+            if job == "purge_orphans":
+                results[job] = purge_orphans(conn)
+            elif job == "incremental_vacuum":
+                results[job] = incremental_vacuum(conn)
+            elif job == "analyze":
+                results[job] = analyze(conn)
+            elif job == "backup":
+                results[job] = backup_database(db_file, backup_dir)
+
+            conn.execute(
+                "INSERT INTO maintenance_runs (job, last_run) VALUES (?, ?) ON CONFLICT (job) DO UPDATE SET last_run = excluded.last_run",
+                (job, now.isoformat(timespec="seconds"))
+            )
+            conn.commit()
+    finally:
+        conn.close()
+    return results
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+def start_scheduler(db_file, backup_dir, check_seconds=SCHEDULER_CHECK_SECONDS):
+    # Un solo hilo por proceso, compartido por todas las sesiones de Streamlit
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return _scheduler_thread
+
+        def scheduler_loop():
+            while True:
+                time.sleep(check_seconds)
+                try:
+                    results = run_due_maintenance(db_file, backup_dir)
+                    if results:
+                        logger.info("Mantenimiento ejecutado: %s", results)
+                except Exception:
+                    logger.exception("Error en el mantenimiento programado de la base de datos")
+
+        _scheduler_thread = threading.Thread(target=scheduler_loop, name="kanban-db-maintenance", daemon=True)
+        _scheduler_thread.start()
+        return _scheduler_thread
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos del Kanban")
+    parser.add_argument("db_file")
+    parser.add_argument("action", choices=["report", "purge", "vacuum", "analyze", "backup"])
+    parser.add_argument("--backup-dir", default=None)
+    args = parser.parse_args()
+
+    backup_dir = args.backup_dir or os.path.join(os.path.dirname(args.db_file), "backups")
+    conn = connect(args.db_file)
+    try:
+        if args.action == "report":
+            print(database_stats(conn))
+            for table_row in table_sizes(conn):
+                print(table_row)
+            print("Imágenes:", blob_sizes(conn))
+            print("Huérfanos:", count_orphans(conn))
+        elif args.action == "purge":
+            print(purge_orphans(conn))
+        elif args.action == "vacuum":
+            print(f"Páginas liberadas: {incremental_vacuum(conn)}")
+        elif args.action == "analyze":
+            analyze(conn)
+        elif args.action == "backup":
+            print(backup_database(args.db_file, backup_dir))
+    finally:
+        conn.close()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación incremental para BI: escribe solo las filas nuevas o modificadas
+desde la última corrida de tasks, task_collaborators y task_interactions, en
+Parquet (si pyarrow está instalado) o CSV, particionadas por fecha y sin imágenes.
+Las filas borradas se escriben aparte (*_deleted) con su llave y deleted = True.
+
+Uso desde consola (por ejemplo en la sincronización nocturna):
+    python delta_export.py kanban_db/kanban.db kanban_db/exports [--format csv]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import db_maintenance
+
+EXPORT_TABLES = ["tasks", "task_collaborators", "task_interactions"]
+# Llave natural de cada tabla: identifica las filas borradas en el destino
+EXPORT_KEYS = {
+    "tasks": ["id"],
+    "task_collaborators": ["task_id", "username"],
+    "task_interactions": ["id"],
+}
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+def export_columns(conn, table):
+    # Las evidencias se reemplazan por un indicador: el BI no necesita el contenido de la imagen
+    columns = [row['name'] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    select_columns = [column for column in columns if column != "image_base64"]
+    if "image_base64" in columns:
+        select_columns.append("image_base64 IS NOT NULL AS has_image")
+    return ", ".join(select_columns)
+
+def write_partition_file(df, export_dir, table, file_name, file_format, run_time):
+    partition_dir = os.path.join(export_dir, table, f"date={run_time.strftime('%Y-%m-%d')}")
+    os.makedirs(partition_dir, exist_ok=True)
+    file_path = os.path.join(partition_dir, f"{file_name}.{file_format}")
+    if file_format == "parquet":
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_csv(file_path, index=False)
+    return file_path
+
+def export_deltas(db_file, export_dir, file_format=None):
+    file_format = file_format or ("parquet" if PARQUET_AVAILABLE else "csv")
+    run_time = datetime.now()
+    written = {}
+
+    conn = db_maintenance.connect(db_file)
+    try:
+        # Cota superior fija: lo que cambie durante la corrida se exporta en la siguiente
+        upper_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM export_changes").fetchone()[0]
+
+        for table in EXPORT_TABLES:
+            source = f"export:{table}"
+            keys = EXPORT_KEYS[table]
+            watermark = conn.execute("SELECT last_id FROM analytics_watermarks WHERE source = ?", (source,)).fetchone()
+            if watermark is None:
+                # Los triggers solo registran cambios si existe el watermark: se crea (-1 = copia pendiente)
+                # antes de leer la tabla, así nada de lo que cambie durante la copia se pierde
+                conn.execute("INSERT INTO analytics_watermarks (source, last_id) VALUES (?, -1)", (source,))
+                conn.commit()
+                last_id = -1
+            else:
+                last_id = watermark['last_id']
+
+            df_deleted = pd.DataFrame(columns=keys)
+            if last_id < 0:
+                # Primera corrida: copia completa de la tabla
+                df_delta = pd.read_sql_query(f"SELECT {export_columns(conn, table)} FROM {table}", conn)
+            else:
+                df_delta = pd.read_sql_query(
+                    f"SELECT {export_columns(conn, table)} FROM {table} WHERE rowid IN "
+                    f"(SELECT row_id FROM export_changes WHERE table_name = ? AND deleted = 0 AND seq > ? AND seq <= ?)",
+                    conn, params=(table, last_id, upper_seq)
+                )
+                deleted_rows = conn.execute(
+                    "SELECT row_key FROM export_changes WHERE table_name = ? AND deleted = 1 AND seq > ? AND seq <= ? ORDER BY seq",
+                    (table, last_id, upper_seq)
+                ).fetchall()
+                if deleted_rows:
+                    df_deleted = pd.DataFrame([json.loads(row['row_key']) for row in deleted_rows], columns=keys).drop_duplicates()
+                    # Una fila borrada y vuelta a crear en la misma ventana solo se exporta como vigente
+                    if not df_delta.empty:
+                        df_deleted = (df_deleted.merge(df_delta[keys], on=keys, how='left', indicator=True)
+                                      .query("_merge == 'left_only'")
+                                      .drop(columns='_merge'))
+
+            result = {"file": None, "rows": len(df_delta), "deleted_file": None, "deleted": len(df_deleted)}
+            file_name = f"{table}_{run_time.strftime('%H%M%S')}_{upper_seq}"
+            if not df_delta.empty:
+                result["file"] = write_partition_file(df_delta, export_dir, table, file_name, file_format, run_time)
+            if not df_deleted.empty:
+                df_deleted['deleted'] = True
+                result["deleted_file"] = write_partition_file(df_deleted, export_dir, table, f"{file_name}_deleted", file_format, run_time)
+            if result["file"] or result["deleted_file"]:
+                written[table] = result
+
+            # El watermark solo avanza cuando los archivos ya quedaron escritos
+            conn.execute("UPDATE analytics_watermarks SET last_id = ? WHERE source = ?", (upper_seq, source))
+            conn.commit()
+
+        # Los cambios que ya exportaron todas las tablas no se vuelven a necesitar
+        conn.execute(
+            "DELETE FROM export_changes WHERE seq <= (SELECT MIN(last_id) FROM analytics_watermarks WHERE source LIKE 'export:%')"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportación incremental del Kanban para BI")
+    parser.add_argument("db_file")
+    parser.add_argument("export_dir")
+    parser.add_argument("--format", choices=["parquet", "csv"], default=None)
+    args = parser.parse_args()
+
+    for table, result in export_deltas(args.db_file, args.export_dir, args.format).items():
+        if result['file']:
+            print(f"{table}: {result['rows']} filas -> {result['file']}")
+        if result['deleted_file']:
+            print(f"{table}: {result['deleted']} borradas -> {result['deleted_file']}")
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del Kanban con sesiones simuladas de streamlit.testing.v1.AppTest.
+
+Cada sesión corre en su propio proceso contra una base de datos local sembrada:
+inicia sesión, filtra el tablero, registra avances con evidencia y, si es
+administrador, consulta Estadísticas. Al final se reportan throughput,
+percentiles de latencia por rerun, errores de bloqueo de la base de datos y
+memoria por sesión.
+
+Uso:
+    python load_test.py --sessions 8 --iterations 20 --tasks 200
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pandas as pd
+from PIL import Image
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, "Kanban.py")
+ADMIN_USER = ("Admin Principal", "admin_password")
+SHIFTS = ["1er Turno", "2do Turno", "3er Turno"]
+PRIORITIES = ["Alta", "Media", "Baja"]
+STATUSES = ["Por hacer", "En proceso", "Hecho"]
+
+def make_image_base64(image_kb):
+    # Ruido aleatorio: el PNG casi no se comprime y pesa lo que se pidió
+    side = max(1, int((image_kb * 1024 / 3) ** 0.5))
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return base64.b64encode(output.getvalue()).decode('utf-8')
+
+def current_rss_mb():
+    # RSS actual (no el pico) desde /proc; en sistemas sin /proc se usa el pico de getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def collaborator_credentials(index):
+    return f"colab_{index}", f"colab_{index}_password"
+
+# --- Base de datos sembrada ---
+def seed_database(work_dir, tasks, collaborators, image_kb, seed=0):
+    from streamlit.testing.v1 import AppTest
+
+    random.seed(seed)
+    os.chdir(work_dir)
+    # Una corrida de la app crea el esquema con init_db
+    AppTest.from_file(APP_FILE, default_timeout=60).run()
+
+    conn = sqlite3.connect(os.path.join("kanban_db", "kanban.db"))
+    try:
+        usernames = []
+        for index in range(collaborators):
+            username, password = collaborator_credentials(index)
+            usernames.append(username)
+            conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)",
+                         (username, hashlib.sha256(password.encode()).hexdigest(), "Colaborador"))
+
+        image_base64 = make_image_base64(image_kb)
+        today = datetime.now()
+        for index in range(tasks):
+            created = today - timedelta(days=random.randint(0, 60))
+            status = random.choice(STATUSES)
+            cursor = conn.execute(
+                "INSERT INTO tasks (task, date, priority, shift, status, completion_date, due_date, description, progress) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (f"Tarea de carga {index}", created.strftime("%Y-%m-%d"), random.choice(PRIORITIES), random.choice(SHIFTS),
+                 status, today.strftime("%Y-%m-%d") if status == "Hecho" else None,
+                 (created + timedelta(days=random.randint(1, 30))).strftime("%Y-%m-%d"),
+                 "Tarea generada por la prueba de carga", 100 if status == "Hecho" else random.randint(0, 9) * 10)
+            )
+            task_id = cursor.lastrowid
+            for username in random.sample(usernames, k=min(len(usernames), random.randint(1, 2))):
+                conn.execute("INSERT INTO task_collaborators (task_id, username) VALUES (?, ?)", (task_id, username))
+            conn.execute(
+                "INSERT INTO task_interactions (task_id, username, action_type, timestamp, comment_text, image_base64, progress_value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, usernames[0], 'progress_update', (created + timedelta(hours=8)).strftime("%Y-%m-%d %H:%M:%S"),
+                 "Avance inicial", image_base64, 50)
+            )
+            if status == "Hecho":
+                conn.execute(
+                    "INSERT INTO task_interactions (task_id, username, action_type, timestamp, new_status, progress_value) VALUES (?, ?, ?, ?, ?, ?)",
+                    (task_id, usernames[0], 'status_change_to_done', today.strftime("%Y-%m-%d %H:%M:%S"), "Hecho", 100)
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+# --- Sesión simulada ---
+class SessionRecorder:
+    def __init__(self):
+        self.timings = []
+        self.lock_errors = 0
+        self.app_errors = []
+
+    def run(self, step, action):
+        start = time.perf_counter()
+        at = action()
+        self.timings.append({"step": step, "seconds": time.perf_counter() - start})
+
+        for message in [element.value for element in at.error] + [element.value for element in at.exception]:
+            if "locked" in str(message):
+                self.lock_errors += 1
+            elif message not in self.app_errors:
+                self.app_errors.append(str(message))
+        return at
+
+def run_session(session_index, work_dir, iterations, image_kb, collaborators, seed):
+    from streamlit.testing.v1 import AppTest
+    # Módulos que importa la app: se cargan antes de la medición base para no contarlos como memoria de la sesión
+    import plotly.express  # noqa: F401
+    import db_maintenance  # noqa: F401
+    import delta_export  # noqa: F401
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(work_dir)
+    rng = random.Random(seed + session_index)
+    recorder = SessionRecorder()
+
+    # Una de cada cuatro sesiones es administrador y ve Estadísticas
+    is_admin = session_index % 4 == 0
+    username, password = ADMIN_USER if is_admin else collaborator_credentials(session_index % collaborators)
+    image_base64 = make_image_base64(image_kb)
+
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    baseline_rss_mb = current_rss_mb()
+    at = recorder.run("inicio", at.run)
+    at.sidebar.text_input[0].input(username)
+    at.sidebar.text_input[1].input(password)
+    at = recorder.run("login", at.sidebar.button[0].click().run)
+
+    for iteration in range(iterations):
+        filter_box = at.selectbox(key="kanban_filter_user")
+        at = recorder.run("filtrar", filter_box.select(rng.choice(filter_box.options)).run)
+
+        progress_buttons = [button for button in at.button if (button.key or "").startswith("submit_progress_comment-")]
+        if progress_buttons:
+            button = rng.choice(progress_buttons)
+            key_suffix = button.key.split("-", 1)[1]
+            task_id = int(key_suffix.split("-")[0])
+            at.slider(key=f"progress_slider-{key_suffix}").set_value(rng.randint(0, 9) * 10)
+            at.text_area(key=f"comment-{key_suffix}").input(f"Avance de carga {session_index}-{iteration}")
+            at = recorder.run("avance", at.button(key=button.key).click().run)
+
+            # AppTest no puede manejar st.file_uploader: la evidencia se guarda con el mismo INSERT de la app
+            start = time.perf_counter()
+            conn = sqlite3.connect(os.path.join("kanban_db", "kanban.db"))
+            try:
+                conn.execute(
+                    "INSERT INTO task_interactions (task_id, username, action_type, timestamp, comment_text, image_base64, progress_value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (task_id, username, 'progress_update', datetime.now().strftime("%Y-%m-%d %H:%M:%S"), None, image_base64, None)
+                )
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e):
+                    recorder.lock_errors += 1
+                else:
+                    recorder.app_errors.append(str(e))
+            finally:
+                conn.close()
+            recorder.timings.append({"step": "evidencia", "seconds": time.perf_counter() - start})
+
+        if is_admin:
+            group_radio = at.radio(key="flow_group_radio")
+            at = recorder.run("estadisticas", group_radio.set_value(rng.choice(group_radio.options)).run)
+
+    return {
+        "session": session_index,
+        "role": "Admin" if is_admin else "Colaborador",
+        "timings": recorder.timings,
+        "lock_errors": recorder.lock_errors,
+        "app_errors": recorder.app_errors,
+        # Cada sesión vive en su propio proceso: el aumento de RSS desde antes del primer rerun es lo que agrega la sesión
+        "session_rss_mb": current_rss_mb() - baseline_rss_mb,
+    }
+
+# --- Reporte ---
+def summarize(results, wall_seconds):
+    df_timings = pd.DataFrame([
+        {**timing, "session": result["session"]} for result in results for timing in result["timings"]
+    ])
+    reruns = df_timings[df_timings["step"] != "evidencia"]
+
+    def latency_stats(seconds):
+        return {
+            "count": int(seconds.count()),
+            "p50_ms": round(seconds.quantile(0.50) * 1000, 1),
+            "p95_ms": round(seconds.quantile(0.95) * 1000, 1),
+            "p99_ms": round(seconds.quantile(0.99) * 1000, 1),
+            "max_ms": round(seconds.max() * 1000, 1),
+        }
+
+    rss = pd.Series([result["session_rss_mb"] for result in results])
+    return {
+        "sessions": len(results),
+        "wall_seconds": round(wall_seconds, 2),
+        "reruns": int(len(reruns)),
+        "reruns_per_second": round(len(reruns) / wall_seconds, 2) if wall_seconds else None,
+        "latency": latency_stats(reruns["seconds"]),
+        "latency_by_step": {step: latency_stats(group["seconds"]) for step, group in df_timings.groupby("step")},
+        "lock_errors": sum(result["lock_errors"] for result in results),
+        "app_errors": sorted({error for result in results for error in result["app_errors"]}),
+        "rss_mb_per_session": {"mean": round(rss.mean(), 1), "max": round(rss.max(), 1)},
+    }
+
+def print_summary(summary):
+    print(f"Sesiones: {summary['sessions']}  Reruns: {summary['reruns']}  Tiempo: {summary['wall_seconds']} s  "
+          f"Throughput: {summary['reruns_per_second']} reruns/s")
+    latency = summary["latency"]
+    print(f"Latencia por rerun: p50 {latency['p50_ms']} ms  p95 {latency['p95_ms']} ms  "
+          f"p99 {latency['p99_ms']} ms  máx {latency['max_ms']} ms")
+    print(pd.DataFrame(summary["latency_by_step"]).T.to_string())
+    print(f"Errores de bloqueo de la base de datos: {summary['lock_errors']}")
+    print(f"Memoria agregada por sesión (RSS): promedio {summary['rss_mb_per_session']['mean']} MB  "
+          f"máx {summary['rss_mb_per_session']['max']} MB")
+    for error in summary["app_errors"]:
+        print(f"Error de la app: {error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del Kanban con AppTest")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--collaborators", type=int, default=10)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="Directorio para la base sembrada (por defecto uno temporal)")
+    parser.add_argument("--json", dest="json_file", default=None, help="Guarda el resumen en un archivo JSON")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="kanban_load_")
+    os.makedirs(work_dir, exist_ok=True)
+    # AppTest reemplaza __main__ en el proceso que lo ejecuta: la siembra también va en un proceso aparte
+    mp_context = multiprocessing.get_context("spawn")
+    print(f"Sembrando base de datos en {work_dir} ...")
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as executor:
+        executor.submit(seed_database, work_dir, args.tasks, args.collaborators, args.image_kb, args.seed).result()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.sessions, mp_context=mp_context) as executor:
+        futures = [
+            executor.submit(run_session, index, work_dir, args.iterations, args.image_kb, args.collaborators, args.seed)
+            for index in range(args.sessions)
+        ]
+        results = [future.result() for future in futures]
+    summary = summarize(results, time.perf_counter() - start)
+
+    print_summary(summary)
+    if args.json_file:
+        with open(args.json_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)